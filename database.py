@@ -15,6 +15,8 @@ GameBase = declarative_base()  # Per-game tables (star_systems, jump_lines)
 
 # Cache for game engines to avoid creating new ones per request
 _game_engines: dict[int, object] = {}
+# Session factories bound to those engines, built once per game
+_game_sessionmakers: dict[int, sessionmaker] = {}
 
 
 def get_db():
@@ -51,7 +53,8 @@ def create_game_database(game_id: int) -> str:
     # CREATE DATABASE cannot run inside a transaction, so we use AUTOCOMMIT.
     postgres_engine = create_engine(BASE_URL + "postgres", isolation_level="AUTOCOMMIT")
     with postgres_engine.connect() as conn:
-        conn.execute(text(f"CREATE DATABASE {db_name}"))
+        quoted = conn.dialect.identifier_preparer.quote(db_name)
+        conn.execute(text(f"CREATE DATABASE {quoted}"))
     postgres_engine.dispose()
 
     # Create tables in the new game database
@@ -63,9 +66,12 @@ def create_game_database(game_id: int) -> str:
 
 def get_game_session(game_id: int):
     """Get a database session for a specific game's database."""
-    game_engine = _get_game_engine(game_id)
-    GameSessionLocal = sessionmaker(bind=game_engine, autocommit=False, autoflush=False)
-    return GameSessionLocal()
+    if game_id not in _game_sessionmakers:
+        game_engine = _get_game_engine(game_id)
+        _game_sessionmakers[game_id] = sessionmaker(
+            bind=game_engine, autocommit=False, autoflush=False
+        )
+    return _game_sessionmakers[game_id]()
 
 
 def drop_game_database(game_id: int):
@@ -73,6 +79,7 @@ def drop_game_database(game_id: int):
     db_name = get_game_db_name(game_id)
 
     # Dispose and remove the cached engine so connections are closed
+    _game_sessionmakers.pop(game_id, None)
     if game_id in _game_engines:
         _game_engines[game_id].dispose()
         del _game_engines[game_id]
@@ -80,10 +87,15 @@ def drop_game_database(game_id: int):
     # Connect to the default 'postgres' database and drop the game DB
     postgres_engine = create_engine(BASE_URL + "postgres", isolation_level="AUTOCOMMIT")
     with postgres_engine.connect() as conn:
-        # Terminate any remaining connections to the game database before dropping
-        conn.execute(text(
-            f"SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
-            f"WHERE datname = '{db_name}' AND pid <> pg_backend_pid()"
-        ))
-        conn.execute(text(f"DROP DATABASE IF EXISTS {db_name}"))
+        quoted = conn.dialect.identifier_preparer.quote(db_name)
+        if conn.dialect.server_version_info >= (13,):
+            # WITH (FORCE) terminates open sessions as part of the drop
+            conn.execute(text(f"DROP DATABASE IF EXISTS {quoted} WITH (FORCE)"))
+        else:
+            # Older servers: terminate remaining connections before dropping
+            conn.execute(text(
+                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                "WHERE datname = :n AND pid <> pg_backend_pid()"
+            ), {"n": db_name})
+            conn.execute(text(f"DROP DATABASE IF EXISTS {quoted}"))
     postgres_engine.dispose()
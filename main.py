@@ -824,6 +824,28 @@ def list_turns(game_id: int, current_user: User = Depends(get_current_user), db:
         game_db.close()
 
 
+def _expand_combatants(combatants) -> list:
+    """Expand a column-wise combatants record into one dict per player.
+
+    Rounds resolved before the column-wise format are already a list and
+    pass through unchanged.
+    """
+    if isinstance(combatants, list):
+        return combatants
+    return [
+        {
+            "player_index": player_index,
+            "ships_before": before,
+            "hits_scored": hits,
+            "ships_after": after,
+        }
+        for player_index, before, hits, after in zip(
+            combatants["players"], combatants["before"],
+            combatants["hits"], combatants["after"],
+        )
+    ]
+
+
 @app.get("/games/{game_id}/turns/{turn_id}/snapshot")
 def get_snapshot(game_id: int, turn_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     game = db.query(Game).filter(Game.game_id == game_id).first()
@@ -848,7 +870,7 @@ def get_snapshot(game_id: int, turn_id: int, current_user: User = Depends(get_cu
                     "system_id": l.system_id,
                     "round_number": l.round_number,
                     "description": l.description,
-                    "combatants": json.loads(l.combatants_json),
+                    "combatants": _expand_combatants(json.loads(l.combatants_json)),
                 }
                 for l in logs
             ],
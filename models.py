@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Text, func
+    Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, func
 )
 from sqlalchemy.orm import relationship
 
@@ -52,6 +52,8 @@ class GamePlayer(Base):
 
 
 # --- Per-game tables (spacegame_game_{id} databases) ---
+# Foreign keys here are DEFERRABLE (initially immediate) so bulk loads can
+# run SET CONSTRAINTS ALL DEFERRED and check them once at commit.
 
 class StarSystem(GameBase):
     __tablename__ = "star_systems"
@@ -72,8 +74,8 @@ class JumpLine(GameBase):
     __tablename__ = "jump_lines"
 
     jump_line_id = Column(Integer, primary_key=True, autoincrement=True)
-    from_system_id = Column(Integer, ForeignKey("star_systems.system_id"), nullable=False)
-    to_system_id = Column(Integer, ForeignKey("star_systems.system_id"), nullable=False)
+    from_system_id = Column(Integer, ForeignKey("star_systems.system_id", deferrable=True), nullable=False, index=True)
+    to_system_id = Column(Integer, ForeignKey("star_systems.system_id", deferrable=True), nullable=False, index=True)
 
     from_system = relationship("StarSystem", foreign_keys=[from_system_id])
     to_system = relationship("StarSystem", foreign_keys=[to_system_id])
@@ -81,9 +83,11 @@ class JumpLine(GameBase):
 
 class Ship(GameBase):
     __tablename__ = "ships"
+    # Ships are looked up by owner, and by owner at a given system
+    __table_args__ = (Index("ix_ships_player_system", "player_index", "system_id"),)
 
     ship_id = Column(Integer, primary_key=True, autoincrement=True)
-    system_id = Column(Integer, ForeignKey("star_systems.system_id"), nullable=False)
+    system_id = Column(Integer, ForeignKey("star_systems.system_id", deferrable=True), nullable=False)
     player_index = Column(Integer, nullable=False)  # -1 = neutral (Founder's World)
     count = Column(Integer, nullable=False, default=0)
 
@@ -94,7 +98,7 @@ class Structure(GameBase):
     __tablename__ = "structures"
 
     structure_id = Column(Integer, primary_key=True, autoincrement=True)
-    system_id = Column(Integer, ForeignKey("star_systems.system_id"), nullable=False)
+    system_id = Column(Integer, ForeignKey("star_systems.system_id", deferrable=True), nullable=False)
     player_index = Column(Integer, nullable=False)
     structure_type = Column(String(20), nullable=False)  # "mine" or "shipyard"
 
@@ -116,8 +120,8 @@ class Order(GameBase):
     turn_id = Column(Integer, nullable=False)
     player_index = Column(Integer, nullable=False)
     order_type = Column(String(20), nullable=False)
-    source_system_id = Column(Integer, ForeignKey("star_systems.system_id"), nullable=False)
-    target_system_id = Column(Integer, ForeignKey("star_systems.system_id"), nullable=True)
+    source_system_id = Column(Integer, ForeignKey("star_systems.system_id", deferrable=True), nullable=False)
+    target_system_id = Column(Integer, ForeignKey("star_systems.system_id", deferrable=True), nullable=True)
     quantity = Column(Integer, nullable=True)
 
     source_system = relationship("StarSystem", foreign_keys=[source_system_id])
@@ -129,8 +133,8 @@ class OrderMaterialSource(GameBase):
     __tablename__ = "order_material_sources"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    order_id = Column(Integer, ForeignKey("orders.order_id"), nullable=False)
-    source_system_id = Column(Integer, ForeignKey("star_systems.system_id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.order_id", deferrable=True), nullable=False)
+    source_system_id = Column(Integer, ForeignKey("star_systems.system_id", deferrable=True), nullable=False)
     amount = Column(Integer, nullable=False)
 
     order = relationship("Order", back_populates="material_sources")
@@ -152,7 +156,7 @@ class CombatLog(GameBase):
 
     log_id = Column(Integer, primary_key=True, autoincrement=True)
     turn_id = Column(Integer, nullable=False, index=True)
-    system_id = Column(Integer, ForeignKey("star_systems.system_id"), nullable=False)
+    system_id = Column(Integer, ForeignKey("star_systems.system_id", deferrable=True), nullable=False)
     round_number = Column(Integer, nullable=False)
     description = Column(Text, nullable=False)
     combatants_json = Column(Text, nullable=False)
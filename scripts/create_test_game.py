@@ -20,6 +20,8 @@ Usage (from back_end/ with venv active and postgresDB set):
 import os, sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+from concurrent.futures import ThreadPoolExecutor
+
 import psycopg2
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
@@ -30,6 +32,7 @@ from models import (
     Game, GamePlayer, User,
 )
 from database import Base
+from script_db import POOL_OPTIONS, dispose_admin_engine, get_admin_engine
 
 GAME_NAME = "test mid-game"
 NUM_PLAYERS = 5
@@ -144,14 +147,103 @@ SHIPS = [
     (17,  5, 6),
 ]
 
+# StarSystem column values for each entry in SYSTEMS, built once at import.
+# The game DB is brand new, so ids are assigned here (idx + 1) rather than
+# flushing each system to learn its generated key.
+_SYSTEM_ROWS = [
+    dict(
+        system_id=s["idx"] + 1,
+        name=s["name"],
+        x=float(s["x"]),
+        y=float(s["y"]),
+        mining_value=s["mv"],
+        materials=MATERIALS,
+        cluster_id=s["cl"],
+        is_home_system=s["home"],
+        is_founders_world=s["fw"],
+        owner_player_index=s["owner"],
+    )
+    for s in SYSTEMS
+]
+
+# System index -> owning player, used to assign structure owners.
+_SYSTEM_OWNERS = {s["idx"]: s["owner"] for s in SYSTEMS}
+
+# System index -> system_id, matching the ids in _SYSTEM_ROWS.
+_IDX_TO_ID = {s["idx"]: row["system_id"] for s, row in zip(SYSTEMS, _SYSTEM_ROWS)}
+
+
+def _set_game_db_name(AdminSession, game_id, db_name):
+    """Record the game database name on the admin Game row."""
+    db = AdminSession()
+    try:
+        game = db.query(Game).filter(Game.game_id == game_id).first()
+        game.db_name = db_name
+        db.commit()
+    finally:
+        db.close()
+
+
+def _populate_game_db(game_engine):
+    """Create the game tables and insert the scenario."""
+    GameBase.metadata.create_all(bind=game_engine)
+    GameSession = sessionmaker(bind=game_engine)
+    gdb = GameSession()
+
+    try:
+        # All rows are known-good, so check foreign keys once at commit
+        gdb.execute(text("SET CONSTRAINTS ALL DEFERRED"))
+
+        # Insert systems with their preassigned ids, then move the serial
+        # sequence past them so later inserts don't collide.
+        gdb.add_all(StarSystem(**row) for row in _SYSTEM_ROWS)
+        gdb.flush()
+        gdb.execute(
+            text("SELECT setval(pg_get_serial_sequence('star_systems', 'system_id'), :n)"),
+            {"n": max(_IDX_TO_ID.values())},
+        )
+        idx_to_id = _IDX_TO_ID
+
+        # Insert jump lines
+        for from_idx, to_idx in JUMP_LINES:
+            gdb.add(JumpLine(
+                from_system_id=idx_to_id[from_idx],
+                to_system_id=idx_to_id[to_idx],
+            ))
+
+        # Insert structures
+        for sys_idx, stype in STRUCTURES:
+            gdb.add(Structure(
+                system_id=idx_to_id[sys_idx],
+                player_index=_SYSTEM_OWNERS[sys_idx],
+                structure_type=stype,
+            ))
+
+        # Insert ships
+        for sys_idx, player_idx, count in SHIPS:
+            gdb.add(Ship(
+                system_id=idx_to_id[sys_idx],
+                player_index=player_idx,
+                count=count,
+            ))
+
+        # Turn 1 (active)
+        gdb.add(Turn(turn_id=1, status="active"))
+
+        # PlayerTurnStatus for each player
+        for pi in range(1, NUM_PLAYERS + 1):
+            gdb.add(PlayerTurnStatus(turn_id=1, player_index=pi, submitted=False))
+
+        gdb.commit()
+    finally:
+        gdb.close()
+
 
 def main():
     base_url = os.environ["postgresDB"]
-    admin_url = base_url + "spacegame_admin"
 
     # --- Admin DB: create game + game_players ---
-    admin_engine = create_engine(admin_url)
-    AdminSession = sessionmaker(bind=admin_engine)
+    AdminSession = sessionmaker(bind=get_admin_engine())
     db = AdminSession()
 
     try:
@@ -188,91 +280,34 @@ def main():
         db.commit()
     finally:
         db.close()
-    admin_engine.dispose()
 
     # --- Create game database ---
     postgres_engine = create_engine(base_url + "postgres", isolation_level="AUTOCOMMIT")
     db_name = get_game_db_name(game_id)
     with postgres_engine.connect() as conn:
-        conn.execute(text(f"CREATE DATABASE {db_name}"))
+        quoted = conn.dialect.identifier_preparer.quote(db_name)
+        conn.execute(text(f"CREATE DATABASE {quoted}"))
     postgres_engine.dispose()
     print(f"Created database: {db_name}")
 
-    # Update game.db_name
-    admin_engine = create_engine(admin_url)
-    AdminSession = sessionmaker(bind=admin_engine)
-    db = AdminSession()
+    # The db_name update and the game DB population touch different
+    # databases, so run them side by side.
+    game_engine = create_engine(base_url + db_name, **POOL_OPTIONS)
     try:
-        game = db.query(Game).filter(Game.game_id == game_id).first()
-        game.db_name = db_name
-        db.commit()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            name_update = pool.submit(_set_game_db_name, AdminSession, game_id, db_name)
+            populate = pool.submit(_populate_game_db, game_engine)
+            name_update.result()
+            populate.result()
     finally:
-        db.close()
-    admin_engine.dispose()
-
-    # --- Populate game database ---
-    game_engine = create_engine(base_url + db_name)
-    GameBase.metadata.create_all(bind=game_engine)
-    GameSession = sessionmaker(bind=game_engine)
-    gdb = GameSession()
-
-    try:
-        # Insert systems
-        idx_to_id = {}
-        for s in SYSTEMS:
-            sys_obj = StarSystem(
-                name=s["name"],
-                x=float(s["x"]),
-                y=float(s["y"]),
-                mining_value=s["mv"],
-                materials=MATERIALS,
-                cluster_id=s["cl"],
-                is_home_system=s["home"],
-                is_founders_world=s["fw"],
-                owner_player_index=s["owner"],
-            )
-            gdb.add(sys_obj)
-            gdb.flush()
-            idx_to_id[s["idx"]] = sys_obj.system_id
-
-        # Insert jump lines
-        for from_idx, to_idx in JUMP_LINES:
-            gdb.add(JumpLine(
-                from_system_id=idx_to_id[from_idx],
-                to_system_id=idx_to_id[to_idx],
-            ))
-
-        # Insert structures
-        for sys_idx, stype in STRUCTURES:
-            owner = next(s["owner"] for s in SYSTEMS if s["idx"] == sys_idx)
-            gdb.add(Structure(
-                system_id=idx_to_id[sys_idx],
-                player_index=owner,
-                structure_type=stype,
-            ))
+        game_engine.dispose()
 
-        # Insert ships
-        for sys_idx, player_idx, count in SHIPS:
-            gdb.add(Ship(
-                system_id=idx_to_id[sys_idx],
-                player_index=player_idx,
-                count=count,
-            ))
-
-        # Turn 1 (active)
-        gdb.add(Turn(turn_id=1, status="active"))
-
-        # PlayerTurnStatus for each player
-        for pi in range(1, NUM_PLAYERS + 1):
-            gdb.add(PlayerTurnStatus(turn_id=1, player_index=pi, submitted=False))
-
-        gdb.commit()
-        print(f"Game database populated: {len(SYSTEMS)} systems, {len(JUMP_LINES)} jump lines")
-        print(f"\nGame #{game_id} ready. Navigate to /game/{game_id}/map to test.")
-    finally:
-        gdb.close()
-    game_engine.dispose()
+    print(f"Game database populated: {len(SYSTEMS)} systems, {len(JUMP_LINES)} jump lines")
+    print(f"\nGame #{game_id} ready. Navigate to /game/{game_id}/map to test.")
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        dispose_admin_engine()
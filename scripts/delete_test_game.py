@@ -18,16 +18,14 @@ from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
 from models import Game, GamePlayer
+from script_db import dispose_admin_engine, get_admin_engine
 
 GAME_NAME = "test mid-game"
 
-
 def main():
     base_url = os.environ["postgresDB"]
-    admin_url = base_url + "spacegame_admin"
 
-    admin_engine = create_engine(admin_url)
-    AdminSession = sessionmaker(bind=admin_engine)
+    AdminSession = sessionmaker(bind=get_admin_engine())
     db = AdminSession()
 
     try:
@@ -59,18 +57,22 @@ def main():
         print("Removed game_players and game from admin DB")
     finally:
         db.close()
-    admin_engine.dispose()
 
     # Drop game database
     if db_name:
         postgres_engine = create_engine(base_url + "postgres", isolation_level="AUTOCOMMIT")
         with postgres_engine.connect() as conn:
-            # Terminate any open connections first
-            conn.execute(text(
-                f"SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
-                f"WHERE datname = '{db_name}' AND pid <> pg_backend_pid()"
-            ))
-            conn.execute(text(f"DROP DATABASE IF EXISTS {db_name}"))
+            quoted = conn.dialect.identifier_preparer.quote(db_name)
+            if conn.dialect.server_version_info >= (13,):
+                # WITH (FORCE) terminates open sessions as part of the drop
+                conn.execute(text(f"DROP DATABASE IF EXISTS {quoted} WITH (FORCE)"))
+            else:
+                # Older servers: terminate any open connections first
+                conn.execute(text(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE datname = :n AND pid <> pg_backend_pid()"
+                ), {"n": db_name})
+                conn.execute(text(f"DROP DATABASE IF EXISTS {quoted}"))
         postgres_engine.dispose()
         print(f"Dropped database: {db_name}")
 
@@ -78,4 +80,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        dispose_admin_engine()
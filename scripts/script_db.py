@@ -0,0 +1,36 @@
+"""
+script_db.py
+------------
+Database helpers shared by the scripts in this directory.
+
+The scripts are run as `python scripts/<name>.py`, which puts this directory
+on sys.path, so they import from here with `from script_db import ...`.
+"""
+
+import os
+
+from sqlalchemy import create_engine
+
+# Pool settings shared by the admin and game engines. The scripts touch the
+# admin DB in more than one phase, so keep connections warm rather than
+# reconnecting.
+POOL_OPTIONS = dict(pool_size=5, max_overflow=10, pool_pre_ping=True, pool_recycle=300)
+
+_ADMIN_ENGINE = None
+
+
+def get_admin_engine():
+    """Return the admin DB engine, creating it on first use."""
+    global _ADMIN_ENGINE
+    if _ADMIN_ENGINE is None:
+        admin_url = os.environ["postgresDB"] + "spacegame_admin"
+        _ADMIN_ENGINE = create_engine(admin_url, **POOL_OPTIONS)
+    return _ADMIN_ENGINE
+
+
+def dispose_admin_engine():
+    """Close the admin engine's pooled connections, if it was ever created."""
+    global _ADMIN_ENGINE
+    if _ADMIN_ENGINE is not None:
+        _ADMIN_ENGINE.dispose()
+        _ADMIN_ENGINE = None
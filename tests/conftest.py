@@ -1,34 +1,176 @@
+import functools
 import os
+from types import SimpleNamespace
 
 # Set dummy DB URL before importing database module (which reads env var at import time)
 os.environ.setdefault("postgresDB", "sqlite:///")
 
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 
+import auth
+from auth import create_access_token, hash_password
 from database import Base, GameBase
 from database import get_db
+from map_generator import generate_map
+from models import Game, GamePlayer, User
 import main
 
 
-# Admin DB (SQLite for testing)
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "bcrypt: runs bcrypt at production cost (deselect with -m 'not bcrypt')"
+    )
+
+
+# Admin DB (in-memory SQLite for testing). StaticPool keeps a single
+# connection so every session sees the same in-memory database. Under
+# pytest-xdist each worker is its own process and so gets its own private
+# in-memory databases. Run with `pytest -n auto --dist=loadfile`: keeping a
+# file's tests on one worker lets them share the session caches below
+# (cached_generate_map, two_player_game, two_player_map).
 admin_engine = create_engine(
-    "sqlite:///./test_admin.db", connect_args={"check_same_thread": False}
+    "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
 )
-AdminSession = sessionmaker(autocommit=False, autoflush=False, bind=admin_engine)
 
-# Game DB (SQLite for testing — single shared DB for all test games)
+# Game DB (in-memory SQLite for testing — single shared DB for all test games)
 game_engine = create_engine(
-    "sqlite:///./test_game.db", connect_args={"check_same_thread": False}
+    "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
 )
-GameSession = sessionmaker(autocommit=False, autoflush=False, bind=game_engine)
 
 
-@pytest.fixture(autouse=True)
+@event.listens_for(admin_engine, "connect")
+@event.listens_for(game_engine, "connect")
+def _disable_pysqlite_transactions(dbapi_conn, _):
+    # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs behave (pysqlite would
+    # otherwise defer BEGIN until the first DML statement).
+    dbapi_conn.isolation_level = None
+
+
+@event.listens_for(admin_engine, "connect")
+@event.listens_for(game_engine, "connect")
+def _skip_durability(dbapi_conn, _):
+    # Test data is thrown away, so never wait on journal or disk syncs.
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+@event.listens_for(admin_engine, "begin")
+@event.listens_for(game_engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+# Sessions are bound per test to a connection holding an outer transaction
+# plus a SAVEPOINT. "rollback_only" makes the app's commit() calls stop short
+# of the SAVEPOINT, so the whole test can be undone with one rollback.
+AdminSession = sessionmaker(autocommit=False, autoflush=False, join_transaction_mode="rollback_only")
+GameSession = sessionmaker(autocommit=False, autoflush=False, join_transaction_mode="rollback_only")
+
+
+@event.listens_for(AdminSession, "after_commit")
+@event.listens_for(GameSession, "after_commit")
+def _checkpoint_savepoint(session):
+    """Release the SAVEPOINT and open a new one, so a later rollback only
+    undoes work since this commit — as it would against a real database."""
+    conn = session.bind
+    nested = conn.get_nested_transaction()
+    if nested is not None:
+        nested.commit()
+        conn.begin_nested()
+
+
+@event.listens_for(AdminSession, "after_transaction_end")
+@event.listens_for(GameSession, "after_transaction_end")
+def _restart_savepoint(session, transaction):
+    """Re-open the per-test SAVEPOINT after a session rolled it back, so the
+    outer transaction stays open and later sessions still join a SAVEPOINT."""
+    conn = session.bind
+    if conn.in_transaction() and not conn.in_nested_transaction():
+        conn.begin_nested()
+
+
+# Minimum bcrypt cost: same algorithm, a fraction of the CPU per hash. Set
+# on the module rather than via the environment so production always hashes
+# at auth's own cost. Must run before _CACHED_HASH below is computed.
+auth.BCRYPT_ROUNDS = 4
+
+# Hash the fixture password once per session rather than once per user.
+_CACHED_HASH = hash_password("testpass")
+
+
+@pytest.fixture(scope="session")
+def cached_generate_map():
+    """generate_map memoized per (num_players, seed) for the test session.
+    The same result objects are handed to every caller: don't mutate them."""
+    return functools.lru_cache(maxsize=None)(generate_map)
+
+
+@pytest.fixture(scope="session")
+def map_for(cached_generate_map):
+    """Return cached_generate_map(num_players, seed=seed) wrapped with lookups
+    that several map tests need, built once per map:
+
+    - result: the generate_map dict itself
+    - homes, founders: the home and Founder's World system dicts
+    - system_owner: system id -> owning player index, or None if neutral
+    - sys_to_cluster: system id -> cluster id (Founder's World is in none)
+    - adj: system id -> ids of the systems it has jump lines to
+    """
+    @functools.lru_cache(maxsize=None)
+    def build(num_players, seed):
+        result = cached_generate_map(num_players, seed=seed)
+        systems = result["systems"]
+        system_owner = {}
+        sys_to_cluster = {}
+        for c in result["clusters"]:
+            for sid in c["system_ids"]:
+                system_owner[sid] = c["player_index"] if c["is_home_cluster"] else None
+                sys_to_cluster[sid] = c["id"]
+        system_owner[0] = None  # Founder's World is neutral
+        adj = {s["id"]: [] for s in systems}
+        for jl in result["jump_lines"]:
+            adj[jl["from_id"]].append(jl["to_id"])
+            adj[jl["to_id"]].append(jl["from_id"])
+        return SimpleNamespace(
+            result=result,
+            homes=[s for s in systems if s["is_home_system"]],
+            founders=[s for s in systems if s["is_founders_world"]],
+            system_owner=system_owner,
+            sys_to_cluster=sys_to_cluster,
+            adj=adj,
+        )
+    return build
+
+
+@pytest.fixture(scope="session")
+def cached_cluster_adj(map_for):
+    """Cluster-level adjacency of map_for(num_players, seed), memoized the
+    same way: {cluster_id: ids of the other clusters it has a jump line to}.
+    Founder's World is in no cluster and is left out."""
+    @functools.lru_cache(maxsize=None)
+    def cluster_adj(num_players, seed):
+        m = map_for(num_players, seed)
+        adj = {c["id"]: set() for c in m.result["clusters"]}
+        for jl in m.result["jump_lines"]:
+            a = m.sys_to_cluster.get(jl["from_id"])
+            b = m.sys_to_cluster.get(jl["to_id"])
+            if a is not None and b is not None and a != b:
+                adj[a].add(b)
+                adj[b].add(a)
+        return adj
+    return cluster_adj
+
+
+@pytest.fixture(scope="session", autouse=True)
 def setup_dbs():
-    """Create all tables before each test, drop them after."""
+    """Create all tables once for the test session, drop them at the end."""
     Base.metadata.create_all(bind=admin_engine)
     GameBase.metadata.create_all(bind=game_engine)
     yield
@@ -36,10 +178,41 @@ def setup_dbs():
     Base.metadata.drop_all(bind=admin_engine)
 
 
+# Connections for the running test, set by db_connections. The app overrides
+# installed by the session-scoped client read from here on every request.
+_current_connections = {}
+
+
+@pytest.fixture(autouse=True)
+def db_connections():
+    """Open one connection per database inside a transaction that is rolled
+    back after the test, so no rows leak between tests.
+
+    A SAVEPOINT inside that transaction absorbs any rollback() issued by the
+    app or the test; see _restart_savepoint.
+    """
+    admin_conn = admin_engine.connect()
+    game_conn = game_engine.connect()
+    admin_trans = admin_conn.begin()
+    game_trans = game_conn.begin()
+    admin_conn.begin_nested()
+    game_conn.begin_nested()
+    _current_connections["admin"] = admin_conn
+    _current_connections["game"] = game_conn
+    try:
+        yield admin_conn, game_conn
+    finally:
+        _current_connections.clear()
+        game_trans.rollback()
+        admin_trans.rollback()
+        game_conn.close()
+        admin_conn.close()
+
+
 @pytest.fixture
-def db_session():
+def db_session(db_connections):
     """Provide an admin database session."""
-    session = AdminSession()
+    session = AdminSession(bind=db_connections[0])
     try:
         yield session
     finally:
@@ -47,20 +220,23 @@ def db_session():
 
 
 @pytest.fixture
-def game_db_session():
+def game_db_session(db_connections):
     """Provide a game database session."""
-    session = GameSession()
+    session = GameSession(bind=db_connections[1])
     try:
         yield session
     finally:
         session.close()
 
 
-@pytest.fixture
-def client(monkeypatch):
-    """Provide a FastAPI test client with mocked DB dependencies."""
+@pytest.fixture(scope="session")
+def client():
+    """Provide a FastAPI test client with mocked DB dependencies.
+
+    Built once per test session; per-test isolation comes from db_connections.
+    """
     def override_get_db():
-        session = AdminSession()
+        session = AdminSession(bind=_current_connections["admin"])
         try:
             yield session
         finally:
@@ -73,42 +249,175 @@ def client(monkeypatch):
         return f"test_game"
 
     def mock_get_game_session(game_id):
-        return GameSession()
+        return GameSession(bind=_current_connections["game"])
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(main, "create_game_database", mock_create_game_db)
+        mp.setattr(main, "get_game_session", mock_get_game_session)
+
+        # Also patch get_game_session in turn_resolver (it imports directly)
+        import turn_resolver
+        mp.setattr(turn_resolver, "get_game_session", mock_get_game_session)
+
+        test_client = TestClient(main.app)
+        yield test_client
+        test_client.close()
+        main.app.dependency_overrides.clear()
 
-    monkeypatch.setattr(main, "create_game_database", mock_create_game_db)
-    monkeypatch.setattr(main, "get_game_session", mock_get_game_session)
 
-    # Also patch get_game_session in turn_resolver (it imports directly)
-    import turn_resolver
-    monkeypatch.setattr(turn_resolver, "get_game_session", mock_get_game_session)
+@functools.lru_cache(maxsize=None)
+def _token_for(user_id):
+    """Mint a JWT once per user id. Ids repeat from test to test because
+    every test's inserts are rolled back, and tokens outlive a test run."""
+    return create_access_token({"sub": str(user_id)})
 
-    yield TestClient(main.app)
-    main.app.dependency_overrides.clear()
+
+def _create_user(session, username, first_name="Test", last_name="User", email=None):
+    """Insert a user directly and return it with auth headers for its token."""
+    user = User(
+        username=username,
+        first_name=first_name,
+        last_name=last_name,
+        email=email or f"{username}@example.com",
+        password=_CACHED_HASH,
+    )
+    session.add(user)
+    session.flush()
+    return user, {"Authorization": f"Bearer {_token_for(user.user_id)}"}
+
+
+@pytest.fixture
+def user_factory(db_session):
+    """Return a callable that inserts a user (skipping /auth/register and
+    bcrypt) and returns ``(user, auth_headers)``."""
+    def make(username, **fields):
+        return _create_user(db_session, username, **fields)
+    return make
 
 
 @pytest.fixture
-def auth_headers(client):
-    """Register a test user via the API and return auth headers."""
-    response = client.post("/auth/register", json={
-        "username": "testuser",
-        "first_name": "Test",
-        "last_name": "User",
-        "email": "test@example.com",
-        "password": "testpass",
-    })
-    token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
+def seeded_test_users(db_session):
+    """Insert test_user1..3, the accounts express-start fills seats from,
+    in one executemany INSERT."""
+    db_session.execute(insert(User), [
+        {
+            "username": f"test_user{i}",
+            "first_name": f"Test{i}",
+            "last_name": f"User{i}",
+            "email": f"test_user{i}@example.com",
+            "password": _CACHED_HASH,
+        }
+        for i in range(1, 4)
+    ])
+    db_session.flush()
+
+
+@pytest.fixture
+def open_4p_game(client, auth_headers):
+    """Create an open 4-player game as testuser and return its game_id."""
+    response = client.post("/games", json={
+        "name": "Open Game",
+        "num_players": 4,
+    }, headers=auth_headers)
+    return response.json()["game_id"]
+
+
+@pytest.fixture
+def dev_mode(monkeypatch):
+    """Allow dev-only endpoints such as express-start.
+
+    main has no dev-mode gate yet, so the stub is installed even though
+    there is no attribute to replace.
+    """
+    monkeypatch.setattr(main, "_is_dev_mode", lambda: True, raising=False)
+
+
+@pytest.fixture
+def auth_headers(user_factory):
+    """Insert a test user and return auth headers."""
+    return user_factory("testuser", email="test@example.com")[1]
+
+
+@pytest.fixture
+def auth_headers_2(user_factory):
+    """Insert a second test user and return auth headers."""
+    return user_factory("testuser2", first_name="Test2", last_name="User2",
+                        email="test2@example.com")[1]
+
+
+# Rows of the game built by the first two_player_game call, replayed by the
+# later ones: {"game_id": int, "users": {user_id: username}, "admin": [...],
+# "game": [...]}
+_BASELINE_2P = {}
+
+
+def _remap_user_ids(row, user_ids):
+    """Point a captured admin row's user references at the ids the same
+    usernames have in the current test."""
+    row = dict(row)
+    for key in ("user_id", "creator_id"):
+        if row.get(key) is not None:
+            username = _BASELINE_2P["users"][row[key]]
+            if username not in user_ids:
+                pytest.fail(
+                    f"two_player_game: captured {key} belongs to {username!r}, "
+                    "who is missing from this test's admin DB; the fixture "
+                    "relies on auth_headers and seeded_test_users to insert it"
+                )
+            row[key] = user_ids[username]
+    return row
+
+
+@pytest.fixture
+def two_player_game(client, auth_headers, seeded_test_users, db_session, game_db_session, dev_mode):
+    """Return the game_id of an active 2-player express game created by
+    testuser.
+
+    Express-start (map generation and seeding) runs only once per session:
+    its rows are captured and inserted again for later tests, and the
+    per-test rollback discards them either way. Users are matched by
+    username, since their ids depend on fixture order.
+    """
+    if not _BASELINE_2P:
+        resp = client.post("/games/express-start", json={
+            "name": "Order Test", "num_players": 2,
+        }, headers=auth_headers)
+        game_id = resp.json()["game_id"]
+        _BASELINE_2P["game_id"] = game_id
+        _BASELINE_2P["users"] = dict(db_session.query(User.user_id, User.username).all())
+        _BASELINE_2P["admin"] = [
+            (table, [dict(r._mapping) for r in db_session.execute(
+                table.select().where(table.c.game_id == game_id))])
+            for table in (Game.__table__, GamePlayer.__table__)
+        ]
+        _BASELINE_2P["game"] = [
+            (table, [dict(r._mapping) for r in game_db_session.execute(table.select())])
+            for table in GameBase.metadata.sorted_tables
+        ]
+        return game_id
+
+    user_ids = {name: uid for uid, name in db_session.query(User.user_id, User.username)}
+    for table, rows in _BASELINE_2P["admin"]:
+        db_session.execute(table.insert(), [_remap_user_ids(r, user_ids) for r in rows])
+    for table, rows in _BASELINE_2P["game"]:
+        if rows:
+            game_db_session.execute(table.insert(), rows)
+    db_session.flush()
+    game_db_session.flush()
+    return _BASELINE_2P["game_id"]
+
+
+# GET /map response for the two_player_game, fetched on first use
+_MAP_2P = {}
 
 
 @pytest.fixture
-def auth_headers_2(client):
-    """Register a second test user via the API and return auth headers."""
-    response = client.post("/auth/register", json={
-        "username": "testuser2",
-        "first_name": "Test2",
-        "last_name": "User2",
-        "email": "test2@example.com",
-        "password": "testpass2",
-    })
-    token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
+def two_player_map(client, request):
+    """Return the /map JSON of the two_player_game. The request is made once
+    per session, so tests must treat the result as read-only."""
+    if not _MAP_2P:
+        game_id = request.getfixturevalue("two_player_game")
+        response = client.get(f"/games/{game_id}/map")
+        assert response.status_code == 200
+        _MAP_2P.update(response.json())
+    return _MAP_2P
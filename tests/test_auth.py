@@ -1,3 +1,8 @@
+import importlib
+
+import pytest
+
+import auth
 from auth import hash_password, verify_password
 
 
@@ -7,6 +12,18 @@ def test_hash_and_verify_password():
     assert not verify_password("wrongpassword", hashed)
 
 
+@pytest.mark.bcrypt
+def test_hash_at_production_cost(monkeypatch):
+    """The suite hashes at the minimum cost; reload auth to check its own
+    default cost once."""
+    # Record the lowered cost so it is put back after the reload below
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", auth.BCRYPT_ROUNDS)
+    importlib.reload(auth)
+    hashed = auth.hash_password("mypassword")
+    assert hashed.startswith("$2b$12$")
+    assert verify_password("mypassword", hashed)
+
+
 def test_register_success(client):
     response = client.post("/auth/register", json={
         "username": "newuser",
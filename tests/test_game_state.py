@@ -1,23 +1,12 @@
 """Tests for Phase 1: initial game state (ships, structures, turns)."""
 
-from models import Ship, Structure, Turn
+from collections import Counter
 
+from models import PlayerTurnStatus, Ship, Structure, Turn
 
-def test_express_start_creates_initial_ships(client, auth_headers, game_db_session, monkeypatch):
-    """Each home system gets 1 ship, Founder's World gets 300 neutral ships."""
-    import main
-    monkeypatch.setattr(main, "_is_dev_mode", lambda: True)
-
-    # Create test_user accounts
-    for i in range(1, 4):
-        client.post("/auth/register", json={
-            "username": f"test_user{i}",
-            "first_name": f"Test{i}",
-            "last_name": f"User{i}",
-            "email": f"test_user{i}@example.com",
-            "password": "testpass",
-        })
 
+def test_express_start_creates_initial_ships(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
+    """Each home system gets 1 ship, Founder's World gets 300 neutral ships."""
     response = client.post("/games/express-start", json={
         "name": "State Test",
         "num_players": 4,
@@ -40,54 +29,34 @@ def test_express_start_creates_initial_ships(client, auth_headers, game_db_sessi
         assert s.count == 1
 
 
-def test_express_start_creates_initial_structures(client, auth_headers, game_db_session, monkeypatch):
+def test_express_start_creates_initial_structures(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """Each home system gets a mine and a shipyard."""
-    import main
-    monkeypatch.setattr(main, "_is_dev_mode", lambda: True)
-
-    for i in range(1, 2):
-        client.post("/auth/register", json={
-            "username": f"test_user{i}",
-            "first_name": f"Test{i}",
-            "last_name": f"User{i}",
-            "email": f"test_user{i}@example.com",
-            "password": "testpass",
-        })
-
     response = client.post("/games/express-start", json={
         "name": "Struct Test",
         "num_players": 2,
     }, headers=auth_headers)
     assert response.status_code == 200
 
-    structures = game_db_session.query(Structure).all()
-    mines = [s for s in structures if s.structure_type == "mine"]
-    yards = [s for s in structures if s.structure_type == "shipyard"]
+    # (structure_type, system_id, player_index) -> count
+    structures = Counter(game_db_session.query(
+        Structure.structure_type, Structure.system_id, Structure.player_index,
+    ).all())
+    by_type = Counter()
+    for (structure_type, _, _), n in structures.items():
+        by_type[structure_type] += n
 
     # 2 players → 2 mines and 2 shipyards
-    assert len(mines) == 2
-    assert len(yards) == 2
+    assert by_type["mine"] == 2
+    assert by_type["shipyard"] == 2
 
     # Each mine+yard should be on the same system as the player's ship
-    for mine in mines:
-        matching_yard = [y for y in yards if y.system_id == mine.system_id and y.player_index == mine.player_index]
-        assert len(matching_yard) == 1
+    for structure_type, system_id, player_index in structures:
+        if structure_type == "mine":
+            assert structures[("shipyard", system_id, player_index)] == 1
 
 
-def test_express_start_creates_turn_1(client, auth_headers, game_db_session, monkeypatch):
+def test_express_start_creates_turn_1(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """Express start creates Turn 1 with status 'active'."""
-    import main
-    monkeypatch.setattr(main, "_is_dev_mode", lambda: True)
-
-    for i in range(1, 2):
-        client.post("/auth/register", json={
-            "username": f"test_user{i}",
-            "first_name": f"Test{i}",
-            "last_name": f"User{i}",
-            "email": f"test_user{i}@example.com",
-            "password": "testpass",
-        })
-
     client.post("/games/express-start", json={
         "name": "Turn Test",
         "num_players": 2,
@@ -99,29 +68,9 @@ def test_express_start_creates_turn_1(client, auth_headers, game_db_session, mon
     assert turns[0].status == "active"
 
 
-def test_map_endpoint_includes_ships_and_structures(client, auth_headers, monkeypatch):
+def test_map_endpoint_includes_ships_and_structures(two_player_map):
     """GET /games/{id}/map should include ships, structures, players, current_turn."""
-    import main
-    monkeypatch.setattr(main, "_is_dev_mode", lambda: True)
-
-    for i in range(1, 2):
-        client.post("/auth/register", json={
-            "username": f"test_user{i}",
-            "first_name": f"Test{i}",
-            "last_name": f"User{i}",
-            "email": f"test_user{i}@example.com",
-            "password": "testpass",
-        })
-
-    game_resp = client.post("/games/express-start", json={
-        "name": "Map API Test",
-        "num_players": 2,
-    }, headers=auth_headers)
-    game_id = game_resp.json()["game_id"]
-
-    response = client.get(f"/games/{game_id}/map")
-    assert response.status_code == 200
-    data = response.json()
+    data = two_player_map
 
     # Check new fields exist
     assert "ships" in data
@@ -148,26 +97,13 @@ def test_map_endpoint_includes_ships_and_structures(client, auth_headers, monkey
         assert "home_system_name" in p
 
 
-def test_express_start_creates_player_turn_status(client, auth_headers, game_db_session, monkeypatch):
+def test_express_start_creates_player_turn_status(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """Express start creates a PlayerTurnStatus row per player for Turn 1."""
-    import main
-    monkeypatch.setattr(main, "_is_dev_mode", lambda: True)
-
-    for i in range(1, 2):
-        client.post("/auth/register", json={
-            "username": f"test_user{i}",
-            "first_name": f"Test{i}",
-            "last_name": f"User{i}",
-            "email": f"test_user{i}@example.com",
-            "password": "testpass",
-        })
-
     client.post("/games/express-start", json={
         "name": "PTS Test",
         "num_players": 2,
     }, headers=auth_headers)
 
-    from models import PlayerTurnStatus
     statuses = game_db_session.query(PlayerTurnStatus).all()
     assert len(statuses) == 2
     for s in statuses:
@@ -175,28 +111,9 @@ def test_express_start_creates_player_turn_status(client, auth_headers, game_db_
         assert s.submitted is False
 
 
-def test_map_endpoint_players_have_correct_colors(client, auth_headers, monkeypatch):
+def test_map_endpoint_players_have_correct_colors(two_player_map):
     """Player colors should be assigned from PLAYER_COLORS by player_index."""
-    import main
-    monkeypatch.setattr(main, "_is_dev_mode", lambda: True)
-
-    for i in range(1, 2):
-        client.post("/auth/register", json={
-            "username": f"test_user{i}",
-            "first_name": f"Test{i}",
-            "last_name": f"User{i}",
-            "email": f"test_user{i}@example.com",
-            "password": "testpass",
-        })
-
-    game_resp = client.post("/games/express-start", json={
-        "name": "Color Test",
-        "num_players": 2,
-    }, headers=auth_headers)
-    game_id = game_resp.json()["game_id"]
-
-    response = client.get(f"/games/{game_id}/map")
-    data = response.json()
+    data = two_player_map
 
     # Check colors are from the expected palette
     expected_colors = ['#e74c3c', '#3498db', '#2ecc71', '#f39c12',
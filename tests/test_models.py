@@ -1,4 +1,7 @@
-from models import Game, StarSystem, JumpLine, Ship, Structure
+from models import (
+    Game, StarSystem, JumpLine, Ship, Structure, Order, OrderMaterialSource,
+    PlayerTurnStatus,
+)
 
 
 def test_create_game(db_session):
@@ -44,7 +47,7 @@ def test_create_jump_line(game_db_session):
         name="B", x=100, y=100, mining_value=7, cluster_id=0,
     )
     game_db_session.add_all([sys_a, sys_b])
-    game_db_session.commit()
+    game_db_session.flush()
 
     jump = JumpLine(
         from_system_id=sys_a.system_id,
@@ -61,7 +64,6 @@ def test_create_jump_line(game_db_session):
 
 def test_order_model_exists(game_db_session):
     """Order model can be instantiated and saved."""
-    from models import Order
     sys = StarSystem(name="TestSys", x=0, y=0, mining_value=5, materials=0, cluster_id=0,
                      is_home_system=False, is_founders_world=False, owner_player_index=1)
     game_db_session.add(sys)
@@ -77,19 +79,11 @@ def test_order_model_exists(game_db_session):
 
 def test_order_material_source_model(game_db_session):
     """OrderMaterialSource links to an Order."""
-    from models import Order, OrderMaterialSource
     sys = StarSystem(name="TestSys", x=0, y=0, mining_value=5, materials=20, cluster_id=0,
                      is_home_system=False, is_founders_world=False, owner_player_index=1)
-    game_db_session.add(sys)
-    game_db_session.flush()
-
-    order = Order(turn_id=1, player_index=1, order_type="build_mine",
-                  source_system_id=sys.system_id)
-    game_db_session.add(order)
-    game_db_session.flush()
-
-    src = OrderMaterialSource(order_id=order.order_id, source_system_id=sys.system_id, amount=15)
-    game_db_session.add(src)
+    order = Order(turn_id=1, player_index=1, order_type="build_mine", source_system=sys)
+    src = OrderMaterialSource(order=order, source_system=sys, amount=15)
+    game_db_session.add_all([sys, order, src])
     game_db_session.commit()
     assert src.id is not None
     assert src.amount == 15
@@ -97,7 +91,6 @@ def test_order_material_source_model(game_db_session):
 
 def test_player_turn_status_model(game_db_session):
     """PlayerTurnStatus tracks submission."""
-    from models import PlayerTurnStatus
     pts = PlayerTurnStatus(turn_id=1, player_index=1, submitted=False)
     game_db_session.add(pts)
     game_db_session.commit()
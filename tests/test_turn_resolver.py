@@ -1,32 +1,26 @@
 """Tests for Phase 3: turn resolution engine."""
 
+import functools
 import json
-import random
 
+import main
 from models import (
-    CombatLog, JumpLine, Order, OrderMaterialSource, PlayerTurnStatus,
+    CombatLog, Game, JumpLine, Order, OrderMaterialSource, PlayerTurnStatus,
     Ship, StarSystem, Structure, Turn, TurnSnapshot,
 )
 
 
-def _setup_2p_game(client, auth_headers, monkeypatch):
+def _setup_2p_game(client, auth_headers):
     """Helper: create a 2-player express-start game and return game_id."""
-    import main
-    monkeypatch.setattr(main, "_is_dev_mode", lambda: True)
-    for i in range(1, 2):
-        client.post("/auth/register", json={
-            "username": f"test_user{i}", "first_name": f"T{i}",
-            "last_name": f"U{i}", "email": f"tu{i}@example.com", "password": "p",
-        })
     resp = client.post("/games/express-start", json={
         "name": "Resolver Test", "num_players": 2,
     }, headers=auth_headers)
     return resp.json()["game_id"]
 
 
-def test_resolve_creates_next_turn(client, auth_headers, game_db_session, monkeypatch):
+def test_resolve_creates_next_turn(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """After resolution, turn 1 is 'resolved' and turn 2 is 'active'."""
-    game_id = _setup_2p_game(client, auth_headers, monkeypatch)
+    game_id = _setup_2p_game(client, auth_headers)
 
     # Force resolve via endpoint
     resp = client.post(f"/games/{game_id}/force-resolve", headers=auth_headers)
@@ -42,9 +36,9 @@ def test_resolve_creates_next_turn(client, auth_headers, game_db_session, monkey
     assert turns[1].status == "active"
 
 
-def test_resolve_build_mine(client, auth_headers, game_db_session, monkeypatch):
+def test_resolve_build_mine(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """Mine structure appears and materials are deducted after resolution."""
-    game_id = _setup_2p_game(client, auth_headers, monkeypatch)
+    game_id = _setup_2p_game(client, auth_headers)
 
     # Find player 1's home system and an adjacent owned-by-nobody system
     ship = game_db_session.query(Ship).filter(Ship.player_index == 1).first()
@@ -91,9 +85,9 @@ def test_resolve_build_mine(client, auth_headers, game_db_session, monkeypatch):
     assert home_sys.materials < 50
 
 
-def test_resolve_build_shipyard(client, auth_headers, game_db_session, monkeypatch):
+def test_resolve_build_shipyard(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """Shipyard appears and 30 materials deducted after resolution."""
-    game_id = _setup_2p_game(client, auth_headers, monkeypatch)
+    game_id = _setup_2p_game(client, auth_headers)
 
     ship = game_db_session.query(Ship).filter(Ship.player_index == 1).first()
     home_id = ship.system_id
@@ -138,9 +132,9 @@ def test_resolve_build_shipyard(client, auth_headers, game_db_session, monkeypat
     assert target_sys.materials == 50 - 30 + target_sys.mining_value
 
 
-def test_resolve_build_ships(client, auth_headers, game_db_session, monkeypatch):
+def test_resolve_build_ships(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """Ship count increases and materials deducted after resolution."""
-    game_id = _setup_2p_game(client, auth_headers, monkeypatch)
+    game_id = _setup_2p_game(client, auth_headers)
 
     ship = game_db_session.query(Ship).filter(Ship.player_index == 1).first()
     home_id = ship.system_id
@@ -170,9 +164,9 @@ def test_resolve_build_ships(client, auth_headers, game_db_session, monkeypatch)
     assert home_sys.materials == 20 - 5 + home_sys.mining_value
 
 
-def test_resolve_move_ships(client, auth_headers, game_db_session, monkeypatch):
+def test_resolve_move_ships(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """Ships move from source to target system."""
-    game_id = _setup_2p_game(client, auth_headers, monkeypatch)
+    game_id = _setup_2p_game(client, auth_headers)
 
     ship = game_db_session.query(Ship).filter(Ship.player_index == 1).first()
     home_id = ship.system_id
@@ -205,10 +199,10 @@ def test_resolve_move_ships(client, auth_headers, game_db_session, monkeypatch):
     assert tgt_ship.count == 3
 
 
-def test_resolve_combat_reduces_ships(client, auth_headers, game_db_session, monkeypatch):
+def test_resolve_combat_reduces_ships(client, auth_headers, game_db_session, dev_mode, seeded_test_users, monkeypatch):
     """Two players fighting results in fewer total ships."""
-    game_id = _setup_2p_game(client, auth_headers, monkeypatch)
-    random.seed(42)
+    game_id = _setup_2p_game(client, auth_headers)
+    monkeypatch.setattr(main, "resolve_turn", functools.partial(main.resolve_turn, seed=42))
 
     # Find a neutral system and place both players' ships there
     neutral = game_db_session.query(StarSystem).filter(
@@ -236,12 +230,11 @@ def test_resolve_combat_reduces_ships(client, auth_headers, game_db_session, mon
     assert len(logs) > 0
 
 
-def test_resolve_combat_ownership_changes(client, auth_headers, game_db_session, monkeypatch):
+def test_resolve_combat_ownership_changes(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """Winner of combat takes system ownership and structures transfer."""
-    game_id = _setup_2p_game(client, auth_headers, monkeypatch)
+    game_id = _setup_2p_game(client, auth_headers)
 
     # Use the API's game session (same factory the resolver uses) to add ships
-    import main
     api_game_db = main.get_game_session(game_id)
 
     neutral = api_game_db.query(StarSystem).filter(
@@ -267,6 +260,10 @@ def test_resolve_combat_ownership_changes(client, auth_headers, game_db_session,
     # Check combat happened at that system
     combat_at_neutral = [l for l in data["combat_logs"] if l["system_id"] == neutral_id]
     assert len(combat_at_neutral) > 0
+    first_round = combat_at_neutral[0]["combatants"]
+    assert [c["player_index"] for c in first_round] == [1, 2]
+    assert first_round[0]["ships_before"] == 50
+    assert set(first_round[0]) == {"player_index", "ships_before", "hits_scored", "ships_after"}
 
     # Check ships — only player 1 should remain
     ships_at_neutral = [s for s in data["ships"] if s["system_id"] == neutral_id]
@@ -277,9 +274,9 @@ def test_resolve_combat_ownership_changes(client, auth_headers, game_db_session,
     assert target_sys["owner_player_index"] == 1
 
 
-def test_resolve_mine_production_adds_materials(client, auth_headers, game_db_session, monkeypatch):
+def test_resolve_mine_production_adds_materials(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """Owned system with mine produces materials."""
-    game_id = _setup_2p_game(client, auth_headers, monkeypatch)
+    game_id = _setup_2p_game(client, auth_headers)
 
     # Player 1 home system has a mine already
     ship = game_db_session.query(Ship).filter(Ship.player_index == 1).first()
@@ -295,9 +292,36 @@ def test_resolve_mine_production_adds_materials(client, auth_headers, game_db_se
     assert home_sys.materials == initial_materials + mining_value
 
 
-def test_resolve_snapshot_saved(client, auth_headers, game_db_session, monkeypatch):
+def test_resolve_captured_mine_skips_production(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
+    """A mine captured this turn changes hands but only produces from next turn."""
+    game_id = _setup_2p_game(client, auth_headers)
+
+    # Neutral system held by player 2 with a mine, and only player 1 ships present
+    target = game_db_session.query(StarSystem).filter(
+        StarSystem.owner_player_index == None,
+        StarSystem.is_founders_world == False,
+    ).first()
+    target_id = target.system_id
+    target.owner_player_index = 2
+    target.mining_value = 3
+    target.materials = 0
+    game_db_session.add(Structure(system_id=target_id, player_index=2, structure_type="mine"))
+    game_db_session.add(Ship(system_id=target_id, player_index=1, count=5))
+    game_db_session.commit()
+
+    client.post(f"/games/{game_id}/force-resolve", headers=auth_headers)
+
+    game_db_session.expire_all()
+    target = game_db_session.query(StarSystem).filter(StarSystem.system_id == target_id).first()
+    mine = game_db_session.query(Structure).filter(Structure.system_id == target_id).first()
+    assert target.owner_player_index == 1
+    assert mine.player_index == 1
+    assert target.materials == 0
+
+
+def test_resolve_snapshot_saved(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """TurnSnapshot row is created after resolution."""
-    game_id = _setup_2p_game(client, auth_headers, monkeypatch)
+    game_id = _setup_2p_game(client, auth_headers)
 
     client.post(f"/games/{game_id}/force-resolve", headers=auth_headers)
 
@@ -310,9 +334,9 @@ def test_resolve_snapshot_saved(client, auth_headers, game_db_session, monkeypat
     assert len(ships) > 0
 
 
-def test_resolve_turn0_snapshot_exists(client, auth_headers, game_db_session, monkeypatch):
+def test_resolve_turn0_snapshot_exists(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """After express-start, snapshot with turn_id=0 exists."""
-    _setup_2p_game(client, auth_headers, monkeypatch)
+    _setup_2p_game(client, auth_headers)
 
     snap = game_db_session.query(TurnSnapshot).filter(TurnSnapshot.turn_id == 0).first()
     assert snap is not None
@@ -322,19 +346,8 @@ def test_resolve_turn0_snapshot_exists(client, auth_headers, game_db_session, mo
     assert orders == []
 
 
-def test_all_submit_triggers_resolve(client, auth_headers, auth_headers_2, game_db_session, monkeypatch):
+def test_all_submit_triggers_resolve(client, auth_headers, auth_headers_2, game_db_session, dev_mode, seeded_test_users):
     """Both players submitting triggers turn resolution."""
-    import main
-    monkeypatch.setattr(main, "_is_dev_mode", lambda: True)
-
-    # Register user2 as test_user1 for the express start
-    # auth_headers_2 already registered testuser2
-    # We need to register test_user1 for the express start
-    client.post("/auth/register", json={
-        "username": "test_user1", "first_name": "T1",
-        "last_name": "U1", "email": "tu1@example.com", "password": "p",
-    })
-
     # Create 2-player game where testuser is player 1 and testuser2 is player 2
     game_resp = client.post("/games", json={
         "name": "Submit Test", "num_players": 2,
@@ -359,9 +372,9 @@ def test_all_submit_triggers_resolve(client, auth_headers, auth_headers_2, game_
     assert turns[1].status == "active"
 
 
-def test_force_resolve_endpoint(client, auth_headers, game_db_session, monkeypatch):
+def test_force_resolve_endpoint(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """POST /force-resolve returns 200 and advances turn."""
-    game_id = _setup_2p_game(client, auth_headers, monkeypatch)
+    game_id = _setup_2p_game(client, auth_headers)
 
     resp = client.post(f"/games/{game_id}/force-resolve", headers=auth_headers)
     assert resp.status_code == 200
@@ -370,9 +383,9 @@ def test_force_resolve_endpoint(client, auth_headers, game_db_session, monkeypat
     assert data["turn_id"] == 1
 
 
-def test_snapshot_endpoint(client, auth_headers, game_db_session, monkeypatch):
+def test_snapshot_endpoint(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
     """GET /turns/0/snapshot returns correct initial state data."""
-    game_id = _setup_2p_game(client, auth_headers, monkeypatch)
+    game_id = _setup_2p_game(client, auth_headers)
 
     resp = client.get(f"/games/{game_id}/turns/0/snapshot", headers=auth_headers)
     assert resp.status_code == 200
@@ -387,9 +400,32 @@ def test_snapshot_endpoint(client, auth_headers, game_db_session, monkeypatch):
     assert len(data["systems"]) > 0
 
 
-def test_victory_detection(client, auth_headers, game_db_session, db_session, monkeypatch):
+def test_snapshot_endpoint_reads_per_player_combat_logs(client, auth_headers, game_db_session, dev_mode, seeded_test_users):
+    """Combat logs stored as one dict per player, as written before the
+    column-wise format, are returned unchanged."""
+    game_id = _setup_2p_game(client, auth_headers)
+
+    system_id = game_db_session.query(StarSystem.system_id).first()[0]
+    combatants = [
+        {"player_index": 1, "ships_before": 4, "hits_scored": 2, "ships_after": 3},
+        {"player_index": 2, "ships_before": 3, "hits_scored": 1, "ships_after": 1},
+    ]
+    game_db_session.add(CombatLog(
+        turn_id=0, system_id=system_id, round_number=1,
+        description="Round 1", combatants_json=json.dumps(combatants),
+    ))
+    game_db_session.commit()
+
+    resp = client.get(f"/games/{game_id}/turns/0/snapshot", headers=auth_headers)
+    assert resp.status_code == 200
+    logs = resp.json()["combat_logs"]
+    assert len(logs) == 1
+    assert logs[0]["combatants"] == combatants
+
+
+def test_victory_detection(client, auth_headers, game_db_session, db_session, dev_mode, seeded_test_users):
     """Placing ships on FW and resolving sets game to completed."""
-    game_id = _setup_2p_game(client, auth_headers, monkeypatch)
+    game_id = _setup_2p_game(client, auth_headers)
 
     # Find Founder's World
     fw = game_db_session.query(StarSystem).filter(StarSystem.is_founders_world == True).first()
@@ -404,7 +440,6 @@ def test_victory_detection(client, auth_headers, game_db_session, db_session, mo
     client.post(f"/games/{game_id}/force-resolve", headers=auth_headers)
 
     # Check game status in admin DB
-    from models import Game
     game = db_session.query(Game).filter(Game.game_id == game_id).first()
     assert game.status == "completed"
     assert game.winner_player_index == 1
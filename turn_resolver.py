@@ -1,7 +1,10 @@
-import json
-import random
 from datetime import datetime, timezone
 
+import numpy as np
+import orjson
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
+
 from models import (
     CombatLog, Game, GamePlayer, Order, OrderMaterialSource,
     PlayerTurnStatus, Ship, StarSystem, Structure, Turn, TurnSnapshot,
@@ -9,19 +12,16 @@ from models import (
 from database import get_game_session
 
 
-def _get_or_create_ship(game_db, system_id, player_index):
-    ship = game_db.query(Ship).filter(
-        Ship.system_id == system_id, Ship.player_index == player_index
-    ).first()
+def _get_or_create_ship(game_db, ships_idx, system_id, player_index):
+    ship = ships_idx.get((system_id, player_index))
     if not ship:
         ship = Ship(system_id=system_id, player_index=player_index, count=0)
         game_db.add(ship)
-        game_db.flush()
+        ships_idx[(system_id, player_index)] = ship
     return ship
 
 
-def _snap_systems(game_db):
-    systems = game_db.query(StarSystem).all()
+def _snap_systems(systems):
     return [
         {
             "system_id": s.system_id,
@@ -39,8 +39,7 @@ def _snap_systems(game_db):
     ]
 
 
-def _snap_ships(game_db):
-    ships = game_db.query(Ship).filter(Ship.count > 0).all()
+def _snap_ships(ships):
     return [
         {
             "ship_id": s.ship_id,
@@ -49,11 +48,11 @@ def _snap_ships(game_db):
             "count": s.count,
         }
         for s in ships
+        if s.count > 0
     ]
 
 
-def _snap_structures(game_db):
-    structures = game_db.query(Structure).all()
+def _snap_structures(structures):
     return [
         {
             "structure_id": s.structure_id,
@@ -86,184 +85,206 @@ def _snap_orders(orders):
     return result
 
 
-def _save_turn_snapshot(game_db, turn_id, orders):
+def _save_turn_snapshot(game_db, turn_id, orders, systems=None, ships=None, structures=None):
+    # Callers that already hold the rows pass them in; anything omitted is read back
+    if systems is None:
+        systems = game_db.query(StarSystem).all()
+    if ships is None:
+        ships = game_db.query(Ship).filter(Ship.count > 0).all()
+    if structures is None:
+        structures = game_db.query(Structure).all()
     snap = TurnSnapshot(
         turn_id=turn_id,
-        systems_json=json.dumps(_snap_systems(game_db)),
-        ships_json=json.dumps(_snap_ships(game_db)),
-        structures_json=json.dumps(_snap_structures(game_db)),
-        orders_json=json.dumps(_snap_orders(orders) if orders else []),
+        systems_json=orjson.dumps(_snap_systems(systems)).decode(),
+        ships_json=orjson.dumps(_snap_ships(ships)).decode(),
+        structures_json=orjson.dumps(_snap_structures(structures)).decode(),
+        orders_json=orjson.dumps(_snap_orders(orders) if orders else []).decode(),
     )
     game_db.add(snap)
 
 
-def resolve_turn(game_id, turn_id, admin_db):
+def resolve_turn(game_id, turn_id, admin_db, seed=None):
     game_db = get_game_session(game_id)
     try:
         # Fetch all orders for this turn
-        orders = game_db.query(Order).filter(Order.turn_id == turn_id).all()
+        # Material sources are read in step 1 and the snapshot; load them in one IN query
+        orders = game_db.query(Order).options(
+            selectinload(Order.material_sources)
+        ).filter(Order.turn_id == turn_id).all()
+        orders_by_type = {}
+        for o in orders:
+            orders_by_type.setdefault(o.order_type, []).append(o)
+
+        # Load every system once; the steps below mutate these in place
+        systems_by_id = {s.system_id: s for s in game_db.query(StarSystem).all()}
+
+        # New structures aren't touched until step 6 reads them back, so they
+        # skip the unit of work and go out as one Core INSERT after step 2
+        new_structures = []
 
         # Step 1 — Build mines
-        for o in orders:
-            if o.order_type != "build_mine":
-                continue
-            game_db.add(Structure(
-                system_id=o.source_system_id,
-                player_index=o.player_index,
-                structure_type="mine",
-            ))
+        for o in orders_by_type.get("build_mine", ()):
+            new_structures.append({
+                "system_id": o.source_system_id,
+                "player_index": o.player_index,
+                "structure_type": "mine",
+            })
             for ms in o.material_sources:
-                sys = game_db.query(StarSystem).filter(
-                    StarSystem.system_id == ms.source_system_id
-                ).first()
-                sys.materials -= ms.amount
+                systems_by_id[ms.source_system_id].materials -= ms.amount
 
         # Step 2 — Build shipyards
-        for o in orders:
-            if o.order_type != "build_shipyard":
-                continue
-            game_db.add(Structure(
-                system_id=o.source_system_id,
-                player_index=o.player_index,
-                structure_type="shipyard",
-            ))
+        for o in orders_by_type.get("build_shipyard", ()):
+            new_structures.append({
+                "system_id": o.source_system_id,
+                "player_index": o.player_index,
+                "structure_type": "shipyard",
+            })
             # Shipyard cost is deducted from the source system directly (no material_sources)
-            src = game_db.query(StarSystem).filter(
-                StarSystem.system_id == o.source_system_id
-            ).first()
-            src.materials -= 30
+            systems_by_id[o.source_system_id].materials -= 30
+
+        if new_structures:
+            game_db.execute(insert(Structure), new_structures)
+
+        # Index ship rows once for steps 3-4; new rows are inserted at the next flush
+        ships_idx = {}
+        for ship in game_db.query(Ship).all():
+            ships_idx.setdefault((ship.system_id, ship.player_index), ship)
 
         # Step 3 — Build ships
-        for o in orders:
-            if o.order_type != "build_ships":
-                continue
+        for o in orders_by_type.get("build_ships", ()):
             # Deduct materials from source system
-            src = game_db.query(StarSystem).filter(
-                StarSystem.system_id == o.source_system_id
-            ).first()
-            src.materials -= o.quantity
-            ship = _get_or_create_ship(game_db, o.source_system_id, o.player_index)
+            systems_by_id[o.source_system_id].materials -= o.quantity
+            ship = _get_or_create_ship(game_db, ships_idx, o.source_system_id, o.player_index)
             ship.count += o.quantity
 
         # Step 4 — Move ships
-        for o in orders:
-            if o.order_type != "move_ships":
-                continue
-            src_ship = _get_or_create_ship(game_db, o.source_system_id, o.player_index)
+        for o in orders_by_type.get("move_ships", ()):
+            src_ship = _get_or_create_ship(game_db, ships_idx, o.source_system_id, o.player_index)
             src_ship.count -= o.quantity
-            tgt_ship = _get_or_create_ship(game_db, o.target_system_id, o.player_index)
+            tgt_ship = _get_or_create_ship(game_db, ships_idx, o.target_system_id, o.player_index)
             tgt_ship.count += o.quantity
 
         game_db.flush()
 
         # Step 5 — Combat
-        all_systems = game_db.query(StarSystem).all()
-        for sys in all_systems:
-            ships_here = game_db.query(Ship).filter(
-                Ship.system_id == sys.system_id, Ship.count > 0
-            ).all()
+        # Private generator per call so concurrent resolutions share no RNG state;
+        # pass seed to pin combat outcomes
+        rng = np.random.default_rng(seed)
+        combat_logs = []
+        live_ships = game_db.query(Ship).filter(Ship.count > 0).all()
+        ships_by_system = {}
+        for ship in live_ships:
+            ships_by_system.setdefault(ship.system_id, []).append(ship)
+        for sys in systems_by_id.values():
+            ships_here = ships_by_system.get(sys.system_id, [])
             players_present = {s.player_index for s in ships_here}
             if len(players_present) < 2:
                 continue
 
+            # Fleet sizes as an array, one slot per player present
             current = {s.player_index: s.count for s in ships_here}
+            players = sorted(current)
+            counts = np.array([current[p] for p in players])
+            players_arr = np.array(players)
             round_num = 1
-            active = {p for p in current if current[p] > 0}
 
-            while len(active) > 1:
-                # Roll hits: each ship has 50% chance to hit
-                hits = {}
-                for p in active:
-                    hits[p] = sum(1 for _ in range(current[p]) if random.random() < 0.5)
+            while np.count_nonzero(counts) > 1:
+                active = np.flatnonzero(counts)
+                ships_before = counts.copy()
 
-                ships_before = {p: current[p] for p in active}
+                # Roll hits: each ship has 50% chance to hit
+                hits = rng.binomial(counts, 0.5)
 
                 if len(active) == 2:
-                    p0, p1 = list(active)
-                    losses = {
-                        p0: min(hits[p1], current[p0]),
-                        p1: min(hits[p0], current[p1]),
-                    }
+                    # Each side loses the other's hits, capped at its fleet size
+                    losses = np.minimum(hits.sum() - hits, counts)
                 else:
-                    losses = {p: 0 for p in active}
-                    for attacker, h in hits.items():
-                        opponents = [p for p in active if p != attacker and current[p] > 0]
-                        if not opponents:
-                            continue
-                        pool = [p for p in opponents for _ in range(current[p])]
-                        for _ in range(h):
-                            if pool:
-                                target = random.choice(pool)
-                                losses[target] += 1
-
-                for p in active:
-                    current[p] = max(0, current[p] - losses.get(p, 0))
-
-                combatants = [
-                    {
-                        "player_index": p,
-                        "ships_before": ships_before[p],
-                        "hits_scored": hits[p],
-                        "ships_after": current[p],
-                    }
-                    for p in active
-                ]
-                game_db.add(CombatLog(
-                    turn_id=turn_id,
-                    system_id=sys.system_id,
-                    round_number=round_num,
-                    description=f"Round {round_num}",
-                    combatants_json=json.dumps(combatants),
-                ))
+                    losses = np.zeros_like(counts)
+                    for attacker in active:
+                        opponents = active[active != attacker]
+                        # Each hit lands on an opponent ship chosen uniformly at random
+                        weights = counts[opponents] / counts[opponents].sum()
+                        losses[opponents] += rng.multinomial(hits[attacker], weights)
+
+                counts = np.maximum(counts - losses, 0)
+
+                # Stored column-wise; the snapshot endpoint expands it per player
+                combatants = {
+                    "players": players_arr[active].tolist(),
+                    "before": ships_before[active].tolist(),
+                    "hits": hits[active].tolist(),
+                    "after": counts[active].tolist(),
+                }
+                combat_logs.append({
+                    "turn_id": turn_id,
+                    "system_id": sys.system_id,
+                    "round_number": round_num,
+                    "description": f"Round {round_num}",
+                    "combatants_json": orjson.dumps(combatants).decode(),
+                })
 
                 round_num += 1
-                active = {p for p in active if current[p] > 0}
+
+            current = dict(zip(players, counts.tolist()))
 
             # Update ship rows
-            for p, count in current.items():
-                ship = _get_or_create_ship(game_db, sys.system_id, p)
-                ship.count = count
+            for ship in ships_here:
+                ship.count = current[ship.player_index]
 
-            # Flush so the DB sees updated counts before the bulk delete
-            game_db.flush()
+        # One executemany for every round fought this turn
+        if combat_logs:
+            game_db.bulk_insert_mappings(CombatLog, combat_logs)
+        # Flush so the DB sees updated counts before the bulk delete
+        game_db.flush()
 
-            # Delete zero-count ships
-            game_db.query(Ship).filter(
-                Ship.system_id == sys.system_id, Ship.count == 0
-            ).delete()
+        # Delete zero-count ships
+        game_db.query(Ship).filter(Ship.count == 0).delete()
 
-        game_db.flush()
+        # Structures built in steps 1-2 are already inserted, so this is the full set
+        structures = game_db.query(Structure).all()
+        structs_by_sys = {}
+        # Mine owners as of before step 6, so a mine captured this turn
+        # doesn't produce until the next one
+        mine_owners_by_sys = {}
+        for struct in structures:
+            structs_by_sys.setdefault(struct.system_id, []).append(struct)
+            if struct.structure_type == "mine":
+                mine_owners_by_sys.setdefault(struct.system_id, set()).add(struct.player_index)
 
         # Step 6 — Ownership changes
-        for sys in all_systems:
-            ships_here = game_db.query(Ship).filter(
-                Ship.system_id == sys.system_id, Ship.count > 0
-            ).all()
-            players_with_ships = {s.player_index for s in ships_here}
+        # Only systems holding ships can change hands; counts are current after combat
+        for system_id, ships_here in ships_by_system.items():
+            players_with_ships = {s.player_index for s in ships_here if s.count > 0}
             if len(players_with_ships) == 1:
+                sys = systems_by_id[system_id]
                 new_owner = list(players_with_ships)[0]
                 if new_owner != sys.owner_player_index:
                     sys.owner_player_index = new_owner
                     # Transfer structures
-                    for struct in game_db.query(Structure).filter(
-                        Structure.system_id == sys.system_id
-                    ).all():
+                    for struct in structs_by_sys.get(system_id, ()):
                         struct.player_index = new_owner
 
         # Step 7 — Mine production
-        for sys in all_systems:
+        # Only systems with a mine can produce
+        for system_id, mine_owners in mine_owners_by_sys.items():
+            sys = systems_by_id[system_id]
             if sys.owner_player_index is None:
                 continue
-            mine = game_db.query(Structure).filter(
-                Structure.system_id == sys.system_id,
-                Structure.structure_type == "mine",
-                Structure.player_index == sys.owner_player_index,
-            ).first()
-            if mine:
+            if sys.owner_player_index in mine_owners:
                 sys.materials += sys.mining_value
 
         # Step 8 — Save snapshot
-        _save_turn_snapshot(game_db, turn_id, orders)
+        # Serialize the rows mutated above instead of re-reading them
+        _save_turn_snapshot(
+            game_db, turn_id, orders,
+            systems=systems_by_id.values(), ships=live_ships, structures=structures,
+        )
+
+        # Read before the commits below expire the loaded systems
+        fw_owner = next(
+            (s.owner_player_index for s in systems_by_id.values() if s.is_founders_world),
+            None,
+        )
 
         # Step 9 — Finalize
         turn = game_db.query(Turn).filter(Turn.turn_id == turn_id).first()
@@ -281,22 +302,20 @@ def resolve_turn(game_id, turn_id, admin_db):
             GamePlayer.game_id == game_id
         ).count()
 
-        for i in range(1, player_count + 1):
-            game_db.add(PlayerTurnStatus(
-                turn_id=next_turn_id, player_index=i, submitted=False
-            ))
+        # One executemany for the next turn's status rows
+        game_db.bulk_insert_mappings(PlayerTurnStatus, [
+            {"turn_id": next_turn_id, "player_index": i, "submitted": False}
+            for i in range(1, player_count + 1)
+        ])
         game_db.commit()
 
         # Update admin DB
         game.current_turn = next_turn_id
 
         # Victory check
-        fw = game_db.query(StarSystem).filter(
-            StarSystem.is_founders_world == True
-        ).first()
-        if fw and fw.owner_player_index is not None and fw.owner_player_index != -1:
+        if fw_owner is not None and fw_owner != -1:
             game.status = "completed"
-            game.winner_player_index = fw.owner_player_index
+            game.winner_player_index = fw_owner
 
         admin_db.commit()
     finally: